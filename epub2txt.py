@@ -9,19 +9,29 @@
 
 import sys
 import os
+import io
 import argparse
+import concurrent.futures
 import zipfile
 import xml.etree.ElementTree as ET
 import urllib.parse
 import shlex
 import re
 import posixpath
+import functools
+import json
+import atexit
+import mmap
+import contextlib
+import copy
+import html as html_entities
+from collections import defaultdict
 from datetime import datetime, timezone
 
 # Graceful import handling for BeautifulSoup
 # Wraps this in a try-except block to provide an error message if the user hasn't installed the required 'beautifulsoup4' library yet.
 try:
-    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+    from bs4 import BeautifulSoup, SoupStrainer, XMLParsedAsHTMLWarning
     from bs4.element import NavigableString, Tag
     import warnings
     # Suppress warnings about parsing XML as HTML (common in EPUBs)
@@ -35,6 +45,19 @@ except ImportError:
     print("Windows: run.bat ")
     sys.exit(1)
 
+# Optional import of lxml.
+# Its C-based parser builds the tree far faster than the pure-Python 'html.parser',
+# so it is preferred by default but the script still works without it.
+try:
+    import lxml  # noqa: F401
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+DEFAULT_PARSER = 'lxml' if LXML_AVAILABLE else 'html.parser'
+
 # XML Namespaces used in EPUB standards.
 # These URLs are required to correctly find tags within the EPUB's internal XML files.
 NAMESPACES = {
@@ -43,6 +66,38 @@ NAMESPACES = {
     'dc': 'http://purl.org/dc/elements/1.1/'
 }
 
+if LXML_AVAILABLE:
+    # Precompiled XPath lookups for the EPUB structure files. Compiling once
+    # at module scope avoids re-parsing the expression and re-resolving
+    # namespaces on every book; local-name() matching handles namespaced and
+    # un-namespaced OPFs in a single pass.
+    _CONTAINER_ROOTFILE_XP = lxml_etree.XPath(
+        "//n:rootfile/@full-path", namespaces={'n': NAMESPACES['n']}
+    )
+    _OPF_ITEMS_XP = lxml_etree.XPath("//*[local-name()='manifest']/*[local-name()='item']")
+    _OPF_SPINE_XP = lxml_etree.XPath("//*[local-name()='spine']")
+    _OPF_ITEMREFS_XP = lxml_etree.XPath(".//*[local-name()='itemref']")
+
+    # One recovering HTML parser shared across all chapters of the lxml-text
+    # path; constructing a parser per chapter re-initializes libxml2 state.
+    # lxml parsers are not thread-safe, but each worker process builds its
+    # own copy at import time, so the process pool is unaffected.
+    _LXML_HTML_PARSER = lxml_html.HTMLParser(recover=True)
+
+# Clark-notation tag names for the ElementTree fallback loops: direct string
+# equality on the precomputed '{uri}tag' (or bare 'tag') form skips the
+# per-element namespace split; rare non-standard namespaces fall back to an
+# allocation-free endswith check.
+_OPF_NS = NAMESPACES['pkg']
+_OPF_ITEM_TAGS = (f"{{{_OPF_NS}}}item", 'item')
+_OPF_ITEMREF_TAGS = (f"{{{_OPF_NS}}}itemref", 'itemref')
+_OPF_SPINE_TAGS = (f"{{{_OPF_NS}}}spine", 'spine')
+_CONTAINER_ROOTFILE_TAGS = (f"{{{NAMESPACES['n']}}}rootfile", 'rootfile')
+
+# NCX tags repeat from a tiny set per document, so the namespace strip is
+# memoized instead of re-splitting every element.
+_ncx_localname = functools.lru_cache(maxsize=64)(lambda tag: tag.split('}')[-1])
+
 BLOCK_TAGS = {
     'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
     'li', 'ul', 'ol', 'dl', 'dt', 'dd',
@@ -54,6 +109,7 @@ BLOCK_TAGS = {
 PRE_TAGS = {'pre', 'code', 'samp', 'kbd', 'tt'}
 
 SKIP_TAGS = {'script', 'style', 'title', 'meta', 'noscript'}
+_SKIP_TAGS_LIST = sorted(SKIP_TAGS)
 
 HEADING_TAGS = {
     'h1': 1,
@@ -66,23 +122,207 @@ HEADING_TAGS = {
 MAX_HEADING_LEVEL = 6
 ANCHOR_MARKER_TAG = 'epub2txt-sep'
 
+# Matches extensions treated as chapter content; everything else in the
+# spine (images, CSS, fonts) is skipped before it is even decompressed.
+# One case-insensitive regex replaces the per-site lower().endswith(tuple)
+# checks and their short-string allocations.
+_HTML_EXT_RE = re.compile(r"\.x?html?$", re.IGNORECASE)
+_EPUB_EXT = '.epub'
+_NCX_EXT = '.ncx'
+
+# Written between chapters and after TOC anchor boundaries.
+CHAPTER_SEPARATOR = "\n\n---\n\n"
+_CHAPTER_SEPARATOR_B = CHAPTER_SEPARATOR.encode('utf-8')
+
+# Archives at least this large are memory-mapped before being handed to
+# zipfile, so header reads and CRC passes run against a kernel-managed view
+# instead of buffered file I/O. Small books aren't worth the mapping setup.
+MMAP_THRESHOLD = 5 * 1024 * 1024
+
+# Buffer size for the output TXT file: passed to open(), it sizes the
+# BufferedWriter underneath the TextIOWrapper. The default 8 KB buffer
+# flushes far too often for multi-MB books; 1 MB keeps sequential writes
+# reaching the filesystem in large chunks.
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Only the <body> subtree carries extractable text, so the <head> section
+# (title/meta/style/link) is filtered out during parsing instead of being
+# built into the tree and decomposed afterwards.
+_BODY_STRAINER = SoupStrainer('body')
+
+# Likewise, only <nav> subtrees matter when reading an EPUB 3 nav document.
+_NAV_STRAINER = SoupStrainer('nav')
+
+# On-disk cache of parsed EPUB structure (OPF path, spine order, TOC path),
+# keyed by absolute path + mtime + size. Repeat batch runs over a library can
+# then skip container/OPF parsing entirely; entries invalidate automatically
+# when a file is overwritten.
+_STRUCTURE_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'epub2txt',
+    'index.json'
+)
+_structure_cache = None
+_structure_cache_dirty = False
+
+# Hard ceiling on cached books: entries for deleted or re-downloaded files
+# are unreachable by the same-path eviction below, so the index is trimmed
+# to the most recently added entries at save time.
+_STRUCTURE_CACHE_MAX = 4096
+
+def _structure_cache_key(epub_path: str) -> str:
+    st = os.stat(epub_path)
+    return f"{os.path.abspath(epub_path)}|{st.st_mtime_ns}|{st.st_size}"
+
+def _load_structure_cache() -> dict:
+    global _structure_cache
+    if _structure_cache is None:
+        try:
+            with open(_STRUCTURE_CACHE_PATH, 'r', encoding='utf-8') as f:
+                _structure_cache = json.load(f)
+        except (OSError, ValueError):
+            _structure_cache = {}
+    return _structure_cache
+
+def _save_structure_cache() -> None:
+    # Registered via atexit; cache trouble must never break a conversion.
+    global _structure_cache
+    if not _structure_cache_dirty:
+        return
+    try:
+        if len(_structure_cache) > _STRUCTURE_CACHE_MAX:
+            # dicts preserve insertion order, so this keeps the newest keys.
+            _structure_cache = dict(
+                list(_structure_cache.items())[-_STRUCTURE_CACHE_MAX:]
+            )
+        os.makedirs(os.path.dirname(_STRUCTURE_CACHE_PATH), exist_ok=True)
+        tmp_path = _STRUCTURE_CACHE_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_structure_cache, f)
+        os.replace(tmp_path, _STRUCTURE_CACHE_PATH)
+    except OSError:
+        pass
+
+atexit.register(_save_structure_cache)
+
+_lxml_warning_shown = False
+
+def status(*lines) -> None:
+    """
+    Emit a group of related status lines (English/Japanese/Chinese) with a
+    single stdout write — one syscall per message instead of one per line.
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def resolve_parser(parser: str = None) -> str:
+    """
+    Pick the BeautifulSoup parser backend to use for chapter HTML.
+
+    Prefers 'lxml' when installed; warns once and falls back to the built-in
+    'html.parser' when the requested backend is unavailable.
+    """
+    global _lxml_warning_shown
+    if not parser:
+        parser = DEFAULT_PARSER
+    if parser in ('lxml', 'lxml-text') and not LXML_AVAILABLE:
+        if not _lxml_warning_shown:
+            status(
+                "Warning: 'lxml' is not installed; falling back to the slower built-in 'html.parser'",
+                "警告: 'lxml' がインストールされていないため、低速な標準の 'html.parser' にフォールバックします",
+                "警告: 未安裝 'lxml'，將改用較慢的內建 'html.parser'"
+            )
+            _lxml_warning_shown = True
+        parser = 'html.parser'
+    return parser
+
+# Collapses runs of blank lines down to a single paragraph break.
+_BLANK_LINES_RE = re.compile(r"[ \t]*\n[ \t\n]+")
+
+# Whitespace normalization patterns, compiled once: these run per text node
+# and per buffer flush, where even the re module's cache lookup adds up.
+_RE_WS = re.compile(r"\s+")
+_RE_HTAB = re.compile(r"[ \t\f\v]+")
+_RE_NL_SPACE = re.compile(r" *\n *")
+_RE_NL_RUN = re.compile(r"\n{3,}")
+_RE_LEAD_NL = re.compile(r"^\n+")
+_RE_TRAIL_NL = re.compile(r"\n+$")
+# One pass for CRLF and bare-CR line endings. A translate() table mapping
+# \r to \n would turn \r\n into a double newline and silently promote
+# line breaks to paragraph breaks, so the regex keeps exact semantics.
+_RE_CR = re.compile(r"\r\n?")
+
+def extract_text_lxml(source) -> str:
+    """
+    Plain-text fast path: extract chapter text with lxml alone.
+
+    Skips BeautifulSoup entirely — the tree is built, stripped of
+    script/style/title/meta and flattened to text in C, so no Python-level
+    tag objects are materialized. Much faster than the structured walker,
+    at the cost of heading/list/math formatting.
+
+    Accepts raw bytes or a binary file-like object; file objects are parsed
+    incrementally without materializing the whole chapter in memory first.
+    """
+    if hasattr(source, 'read'):
+        doc = lxml_html.parse(source, parser=_LXML_HTML_PARSER).getroot()
+    else:
+        doc = lxml_html.fromstring(source, parser=_LXML_HTML_PARSER)
+    if doc is None:
+        return ""
+    lxml_etree.strip_elements(doc, 'script', 'style', 'title', 'meta', 'noscript', with_tail=False)
+    text = doc.text_content()
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+# Last-resort fast path (--fast): strip tags with precompiled regexes
+# instead of parsing. Only safe for simple, well-formed chapters; the caller
+# falls back to a full parse when the result looks broken.
+_HEAD_BLOCK_RE = re.compile(rb"<head\b.*?</head\s*>", re.IGNORECASE | re.DOTALL)
+_SCRIPT_BLOCK_RE = re.compile(rb"<script\b.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+_STYLE_BLOCK_RE = re.compile(rb"<style\b.*?</style\s*>", re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(rb"<!--.*?-->", re.DOTALL)
+_TAG_RE = re.compile(rb"<[^>]+>")
+
+def extract_text_fast(content: bytes) -> str:
+    """
+    Regex tag-stripping fast path for trivially structured chapters.
+
+    Removes head/script/style blocks and comments, replaces every remaining
+    tag with a newline, then decodes entities and collapses blank lines.
+    No tree is ever built, so this runs entirely inside the C regex engine.
+    """
+    content = _HEAD_BLOCK_RE.sub(b"", content)
+    content = _SCRIPT_BLOCK_RE.sub(b"", content)
+    content = _STYLE_BLOCK_RE.sub(b"", content)
+    content = _COMMENT_RE.sub(b"", content)
+    text = _TAG_RE.sub(b"\n", content).decode('utf-8', errors='replace')
+    text = html_entities.unescape(text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+# Percent-decoded hrefs repeat heavily within a book (and across books from
+# the same publisher in batch runs), so decode results are memoized.
+_unquote = functools.lru_cache(maxsize=4096)(urllib.parse.unquote)
+
+# normpath re-splits and re-joins its argument on every call, and TOCs hit
+# the same few chapter paths hundreds of times, so results are memoized too.
+_normpath = functools.lru_cache(maxsize=2048)(posixpath.normpath)
+
 def resolve_zip_path(base_dir: str, href: str) -> str:
     if not href:
         return ""
-    href = urllib.parse.unquote(href)
+    href = _unquote(href)
     href = href.split('#', 1)[0]
     if not href:
         return ""
     if base_dir:
-        return posixpath.normpath(posixpath.join(base_dir, href))
-    return posixpath.normpath(href)
+        return _normpath(posixpath.join(base_dir, href))
+    return _normpath(href)
 
 def split_toc_href(base_dir: str, href: str):
     if not href:
         return "", ""
     path_part, _, fragment = href.partition('#')
     path = resolve_zip_path(base_dir, path_part)
-    fragment = urllib.parse.unquote(fragment) if fragment else ""
+    fragment = _unquote(fragment) if fragment else ""
     return path, fragment
 
 
@@ -94,13 +334,18 @@ def get_epub_rootfile(zip_ref: zipfile.ZipFile) -> str:
     This file points to the 'rootfile' (usually ends in .opf), which contains the book's metadata and file structure.
     """
     try:
-        # Read the container.xml file from inside the zip
-        container_xml = zip_ref.read('META-INF/container.xml')
-        root = ET.fromstring(container_xml)
-        
         # Find the <rootfile> tag using the namespace
-        rootfile_path = root.find(".//n:rootfile", NAMESPACES).attrib['full-path']
-        return rootfile_path
+        if LXML_AVAILABLE:
+            with zip_ref.open('META-INF/container.xml') as fp:
+                root = lxml_etree.parse(fp).getroot()
+            return _CONTAINER_ROOTFILE_XP(root)[0]
+        # Fallback: stream the file and stop at the first rootfile element
+        # instead of building a tree for the whole document.
+        with zip_ref.open('META-INF/container.xml') as fp:
+            for _, elem in ET.iterparse(fp, events=('start',)):
+                if elem.tag in _CONTAINER_ROOTFILE_TAGS or elem.tag.endswith('}rootfile'):
+                    return elem.attrib['full-path']
+        raise ValueError("container.xml has no rootfile element")
     except Exception:
         # Fallback: If container.xml is missing or broken, search effectively
         # for any file ending in '.opf' to try and salvage the book.
@@ -122,51 +367,62 @@ def parse_opf(zip_ref: zipfile.ZipFile, opf_path: str):
     1. <manifest>: Lists ALL files in the book (images, styles, chapters).
     2. <spine>: Lists ONLY the reading order of the chapters (by ID).
     """
-    # Read the OPF file content
-    opf_content = zip_ref.read(opf_path)
-    root = ET.fromstring(opf_content)
-    
-    # Create the OPF namespace map dynamically to handle varying versions (2.0 vs 3.0).
-    # Some OPFs are un-namespaced; handle both cases.
-    has_namespace = '}' in root.tag
-    ns = {'pkg': root.tag.split('}')[0].strip('{')} if has_namespace else {}
-    
+    # Locate the manifest items and spine attributes.
+    # The precompiled lxml XPaths match namespaced and un-namespaced OPFs
+    # alike (2.0 vs 3.0, or sloppy files with no namespace at all); the
+    # ElementTree fallback streams the file with iterparse instead of
+    # building a full DOM, clearing elements as they close.
+    if LXML_AVAILABLE:
+        with zip_ref.open(opf_path) as fp:
+            root = lxml_etree.parse(fp).getroot()
+        manifest_attribs = [item.attrib for item in _OPF_ITEMS_XP(root)]
+        spine_elems = _OPF_SPINE_XP(root)
+        spine_attrib = spine_elems[0].attrib if spine_elems else None
+        itemref_attribs = (
+            [el.attrib for el in _OPF_ITEMREFS_XP(spine_elems[0])] if spine_elems else []
+        )
+    else:
+        manifest_attribs = []
+        spine_attrib = None
+        itemref_attribs = []
+        with zip_ref.open(opf_path) as fp:
+            for _, elem in ET.iterparse(fp, events=('end',)):
+                tag = elem.tag
+                if tag in _OPF_ITEM_TAGS or tag.endswith('}item'):
+                    manifest_attribs.append(dict(elem.attrib))
+                elif tag in _OPF_ITEMREF_TAGS or tag.endswith('}itemref'):
+                    itemref_attribs.append(dict(elem.attrib))
+                elif tag in _OPF_SPINE_TAGS or tag.endswith('}spine'):
+                    spine_attrib = dict(elem.attrib)
+                elem.clear()
+
     # 1. Parse Manifest: Map ID -> Href (File Path)
     # Creates a dictionary where valid IDs point to their actual file locations.
     manifest_items = {}
     nav_href = None
     ncx_href = None
-    if has_namespace:
-        manifest_items_iter = root.findall(".//pkg:manifest/pkg:item", ns)
-    else:
-        manifest_items_iter = root.findall(".//manifest/item")
-    for item in manifest_items_iter:
-        item_id = item.attrib.get('id')
-        href = item.attrib.get('href')
+    for attrs in manifest_attribs:
+        item_id = attrs.get('id')
+        href = attrs.get('href')
         if not item_id or not href:
             continue
-        properties = item.attrib.get('properties', '')
+        properties = attrs.get('properties', '')
         if properties and 'nav' in properties.split():
             nav_href = href
-        media_type = item.attrib.get('media-type', '')
+        media_type = attrs.get('media-type', '')
         if media_type == 'application/x-dtbncx+xml':
             ncx_href = href
         manifest_items[item_id] = href
-        
+
     # 2. Parse Spine: Get linear reading order
     # The spine tells the parser the order in which to display the items found in the manifest.
     spine_hrefs = []
-    spine = root.find(".//pkg:spine", ns) if has_namespace else root.find(".//spine")
-    if spine is not None:
-        toc_id = spine.attrib.get('toc')
+    if spine_attrib is not None:
+        toc_id = spine_attrib.get('toc')
         if toc_id and toc_id in manifest_items:
             ncx_href = manifest_items[toc_id]
-        if has_namespace:
-            spine_items = spine.findall(".//pkg:itemref", ns)
-        else:
-            spine_items = spine.findall(".//itemref")
-        for itemref in spine_items:
-            item_id = itemref.attrib.get('idref')
+        for attrs in itemref_attribs:
+            item_id = attrs.get('idref')
             if item_id in manifest_items:
                 spine_hrefs.append(manifest_items[item_id])
             
@@ -186,7 +442,10 @@ def parse_opf(zip_ref: zipfile.ZipFile, opf_path: str):
     return full_paths, toc_path
 
 def parse_nav_toc_entries(nav_content: str, toc_dir: str):
-    soup = BeautifulSoup(nav_content, 'html.parser')
+    # Same backend selection as chapter parsing: lxml when installed.
+    # Only the <nav> subtrees are parsed; the rest of the document never
+    # enters the tree.
+    soup = BeautifulSoup(nav_content, resolve_parser(None), parse_only=_NAV_STRAINER)
     nav = (
         soup.find('nav', attrs={'epub:type': 'toc'})
         or soup.find('nav', attrs={'role': 'doc-toc'})
@@ -204,7 +463,9 @@ def parse_nav_toc_entries(nav_content: str, toc_dir: str):
         for li in list_tag.find_all('li', recursive=False):
             link = li.find('a', href=True)
             if link:
-                title = " ".join(link.get_text(" ", strip=True).split())
+                # Iterate text nodes directly instead of materializing
+                # get_text()'s intermediate string before re-splitting.
+                title = " ".join(" ".join(link.stripped_strings).split())
                 path, fragment = split_toc_href(toc_dir, link.get('href'))
                 if path:
                     entries.append({'path': path, 'fragment': fragment, 'title': title, 'depth': depth})
@@ -215,13 +476,67 @@ def parse_nav_toc_entries(nav_content: str, toc_dir: str):
     walk_list(list_root, 1)
     return entries
 
-def parse_ncx_toc_entries(ncx_content: str, toc_dir: str):
+def _parse_ncx_iterparse(ncx_source, toc_dir: str):
+    """
+    Streaming NCX fallback: walk navPoints in document order with a depth
+    counter via ET.iterparse, clearing elements as their subtrees close,
+    instead of materializing a DOM for what can be a megabyte-scale navmap.
+    Accepts raw bytes or a binary file-like object.
+    """
+    if not hasattr(ncx_source, 'read'):
+        ncx_source = io.BytesIO(ncx_source)
+    collected = []
+    open_points = []  # navPoint records whose subtree is still open
+    in_label = False
     try:
-        root = ET.fromstring(ncx_content)
+        for event, elem in ET.iterparse(ncx_source, events=('start', 'end')):
+            tag = _ncx_localname(elem.tag)
+            if event == 'start':
+                if tag == 'navPoint':
+                    rec = {'src': '', 'title': '', 'depth': len(open_points) + 1}
+                    open_points.append(rec)
+                    collected.append(rec)
+                elif open_points:
+                    if tag == 'content' and not open_points[-1]['src']:
+                        open_points[-1]['src'] = elem.attrib.get('src') or ''
+                    elif tag == 'navLabel':
+                        in_label = True
+            else:
+                if tag == 'navPoint':
+                    open_points.pop()
+                    elem.clear()
+                elif tag == 'navLabel':
+                    in_label = False
+                elif tag == 'text' and in_label and open_points and not open_points[-1]['title']:
+                    open_points[-1]['title'] = (elem.text or '').strip()
     except ET.ParseError:
         return []
 
+    entries = []
+    for rec in collected:
+        path, fragment = split_toc_href(toc_dir, rec['src'])
+        if path:
+            entries.append({'path': path, 'fragment': fragment, 'title': rec['title'], 'depth': rec['depth']})
+    return entries
+
+def parse_ncx_toc_entries(ncx_source, toc_dir: str):
+    # Same library unification as the OPF path: lxml when installed,
+    # otherwise a streaming ElementTree fallback that never builds the
+    # full navMap tree. Accepts raw bytes or a binary file-like object.
+    if not LXML_AVAILABLE:
+        return _parse_ncx_iterparse(ncx_source, toc_dir)
+    try:
+        if hasattr(ncx_source, 'read'):
+            root = lxml_etree.parse(ncx_source).getroot()
+        else:
+            root = lxml_etree.fromstring(ncx_source)
+    except lxml_etree.XMLSyntaxError:
+        return []
+
     def local_name(elem):
+        # lxml models comments/PIs as elements whose tag is not a string.
+        if not isinstance(elem.tag, str):
+            return ""
         return elem.tag.split('}')[-1]
 
     def child_by_local_name(elem, name):
@@ -266,44 +581,92 @@ def parse_ncx_toc_entries(ncx_content: str, toc_dir: str):
 def parse_toc_entries(zip_ref: zipfile.ZipFile, toc_path: str):
     if not toc_path:
         return []
+    toc_dir = posixpath.dirname(toc_path)
     try:
+        if toc_path.lower().endswith(_NCX_EXT):
+            # NCX parsing streams on both backends; nav documents go through
+            # BeautifulSoup, which reads file objects in full anyway.
+            with zip_ref.open(toc_path) as fp:
+                return parse_ncx_toc_entries(fp, toc_dir)
         toc_content = zip_ref.read(toc_path)
     except KeyError:
         return []
-
-    toc_dir = posixpath.dirname(toc_path)
-    if toc_path.lower().endswith('.ncx'):
-        return parse_ncx_toc_entries(toc_content, toc_dir)
     return parse_nav_toc_entries(toc_content, toc_dir)
 
-def select_toc_chapter_anchors(entries):
+def select_toc_chapter_anchors(entries, spine_paths=None):
     if not entries:
         return {}
 
-    anchors = {}
+    # Inner dicts act as ordered sets: membership is O(1) where the old
+    # list-scan dedup went quadratic on anchor-heavy textbook chapters.
+    anchors = defaultdict(dict)
     for entry in entries:
         if entry.get('depth') != 1:
             continue
         path = entry.get('path') or ''
         fragment = entry.get('fragment') or ''
-        if not path.lower().endswith(('.html', '.htm', '.xhtml')):
+        if not _HTML_EXT_RE.search(path):
             continue
         if not fragment:
             continue
-        path = posixpath.normpath(path)
-        anchor_list = anchors.setdefault(path, [])
-        if fragment not in anchor_list:
-            anchor_list.append(fragment)
-    return anchors
+        path = _normpath(path)
+        # TOC entries pointing outside the spine (covers, landmarks) can
+        # never match a processed chapter; keep the anchor map minimal.
+        if spine_paths is not None and path not in spine_paths:
+            continue
+        anchors[path][fragment] = None
+    return {path: list(fragments) for path, fragments in anchors.items()}
+
+def _is_math_script(tag) -> bool:
+    """MathJax/TeX payload scripts are content the extractor keeps."""
+    script_type = (tag.get('type') or '').lower()
+    return 'math/tex' in script_type or 'math/latex' in script_type
 
 def insert_anchor_markers(soup: BeautifulSoup, anchor_ids):
     if not anchor_ids:
         return
+    # One pass over the tree collects the wanted id/name targets up front;
+    # the per-anchor soup.find calls cost two full traversals per TOC anchor
+    # (O(anchors x nodes) on anchor-heavy reference chapters).
+    wanted = {anchor_id for anchor_id in anchor_ids if anchor_id}
+    if not wanted:
+        return
+    def in_skipped_subtree(tag):
+        # The old decompose pass deleted style/title/meta/noscript and
+        # non-math scripts before anchors were resolved, so ids sitting on
+        # or inside those subtrees must stay invisible here too — the
+        # walker never emits their content, and a marker would inject a
+        # spurious chapter separator.
+        node = tag
+        while node is not None and node.name:
+            if node.name in SKIP_TAGS and not (node.name == 'script' and _is_math_script(node)):
+                return True
+            node = node.parent
+        return False
+
+    id_map = {}
+    name_map = {}
+    for tag in soup.find_all(True):
+        tag_id = tag.get('id')
+        tag_name = tag.get('name')
+        if (tag_id not in wanted or tag_id in id_map) and \
+                (tag_name not in wanted or tag_name in name_map):
+            continue
+        if in_skipped_subtree(tag):
+            continue
+        if tag_id in wanted and tag_id not in id_map:
+            id_map[tag_id] = tag
+        if tag_name in wanted and tag_name not in name_map:
+            name_map[tag_name] = tag
+
+    # new_tag runs full Tag initialization; a shallow copy of one template
+    # is cheaper when a chapter carries many anchors.
+    marker_template = soup.new_tag(ANCHOR_MARKER_TAG)
     seen_targets = set()
     for anchor_id in anchor_ids:
         if not anchor_id:
             continue
-        target = soup.find(id=anchor_id) or soup.find(attrs={'name': anchor_id})
+        target = id_map.get(anchor_id) or name_map.get(anchor_id)
         if not target:
             continue
         heading_target = target.find_parent(list(HEADING_TAGS.keys()))
@@ -312,18 +675,160 @@ def insert_anchor_markers(soup: BeautifulSoup, anchor_ids):
         if target_key in seen_targets:
             continue
         seen_targets.add(target_key)
-        marker = soup.new_tag(ANCHOR_MARKER_TAG)
-        target.insert_before(marker)
+        target.insert_before(copy.copy(marker_template))
+
+def _prepare_chapter(source, anchor_ids, parser: str):
+    """
+    Parse a single chapter and return either its finished text (for the
+    string-based lxml-text/fast paths) or a prepared BeautifulSoup tree
+    ready for the text walker.
+
+    Accepts raw bytes or a binary file-like object. BeautifulSoup reads file
+    objects in full anyway, and the raw bytes are needed again if the <body>
+    fallback re-parse triggers, so the bs4 path materializes them up front;
+    only the lxml-text path parses incrementally.
+    """
+    if parser == 'lxml-text':
+        # Plain-text fast path: no soup, no anchor markers.
+        return extract_text_lxml(source)
+
+    if hasattr(source, 'read'):
+        source = source.read()
+
+    if parser == 'fast':
+        text = extract_text_fast(source)
+        # Heuristic: a regex strip that yields under ~1% of the input size
+        # probably hit markup it can't handle — redo with the real parser.
+        if len(text) >= max(1, len(source) // 100):
+            return text
+        return extract_chapter_text(source, anchor_ids, resolve_parser(None))
+
+    # Straining to <body> keeps the head subtree out of the tree entirely.
+    soup = BeautifulSoup(source, parser, parse_only=_BODY_STRAINER)
+    if not soup.contents:
+        # Rare malformed chapters without a <body>: parse the whole document.
+        soup = BeautifulSoup(source, parser)
+
+    # No decompose pass: the text walker already skips script/style/title/
+    # meta/noscript (keeping MathJax/TeX scripts), so unlinking them here
+    # was a redundant extra tree traversal per chapter.
+    insert_anchor_markers(soup, anchor_ids)
+    return soup
+
+def extract_chapter_text(source, anchor_ids, parser: str) -> str:
+    """One-string variant of chapter extraction, e.g. for the worker pool."""
+    prepared = _prepare_chapter(source, anchor_ids, parser)
+    if isinstance(prepared, str):
+        return prepared
+    return get_clean_text(prepared)
+
+# Error marker a worker returns when the OPF names a file the zip lacks.
+_MISSING_ENTRY = '__missing__'
+
+# One zip handle per (worker process, book): ZipFile objects don't pickle,
+# so workers open the archive themselves and keep it for subsequent chapters
+# of the same book instead of re-reading the central directory every task.
+_worker_zip = None
+_worker_zip_path = None
+
+def _get_worker_zip(epub_path: str) -> zipfile.ZipFile:
+    global _worker_zip, _worker_zip_path
+    if _worker_zip_path != epub_path:
+        if _worker_zip is not None:
+            _worker_zip.close()
+        _worker_zip = zipfile.ZipFile(epub_path, 'r')
+        _worker_zip_path = epub_path
+    return _worker_zip
+
+def _extract_chapter_task(task):
+    """
+    Worker-side wrapper for parallel extraction: read one chapter from the
+    worker's own zip handle and return (file_path, text, error) so failures
+    surface per chapter instead of killing the whole pool.
+    """
+    epub_path, file_path, anchor_ids, parser = task
+    try:
+        content = _get_worker_zip(epub_path).read(file_path)
+    except KeyError:
+        return file_path, None, _MISSING_ENTRY
+    except Exception as e:
+        return file_path, None, str(e)
+    try:
+        return file_path, extract_chapter_text(content, anchor_ids, parser), None
+    except Exception as e:
+        return file_path, None, str(e)
 
-def epub_to_text(epub_path: str, output_txt_path: str) -> None:
+def _convert_one_epub(task):
+    """
+    Worker-side wrapper for batch mode: convert one EPUB serially and return
+    (epub_path, error) so one broken book doesn't stop the batch.
+    """
+    epub_path, output_txt_path, parser = task
+    try:
+        epub_to_text(epub_path, output_txt_path, parser=parser)
+        return epub_path, None
+    except Exception as e:
+        return epub_path, str(e)
+
+def resolve_jobs(jobs) -> int:
+    """Normalize the worker count: 0 means one worker per CPU core."""
+    if jobs is None or jobs < 0:
+        return 1
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+class _MmapReader(io.RawIOBase):
+    """
+    Seekable file adapter over an mmap view. mmap itself lacks the io
+    protocol extras zipfile relies on (seekable() and friends) before
+    Python 3.13, so reads are funnelled through this thin raw stream.
+    """
+    def __init__(self, mm):
+        self._mm = mm
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._mm.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def seek(self, pos, whence=0):
+        self._mm.seek(pos, whence)
+        return self._mm.tell()
+
+    def tell(self):
+        return self._mm.tell()
+
+@contextlib.contextmanager
+def _open_epub_zip(epub_path: str):
+    """Open the EPUB as a ZipFile, via mmap when the archive is large."""
+    if os.path.getsize(epub_path) >= MMAP_THRESHOLD:
+        with open(epub_path, 'rb') as raw:
+            with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with zipfile.ZipFile(io.BufferedReader(_MmapReader(mm)), 'r') as zip_ref:
+                    yield zip_ref
+    else:
+        with zipfile.ZipFile(epub_path, 'r') as zip_ref:
+            yield zip_ref
+
+def epub_to_text(epub_path: str, output_txt_path: str, parser: str = None, jobs: int = 1) -> None:
     """
     Optimized extraction that streams text chapter-by-chapter.
-    
+
     Instead of loading the entire book into memory, this function:
     1. Opens the EPUB as a Zip archive.
     2. Determines the reading order.
     3. Reads one chapter at a time, extracts text, writes to disk, and forgets it.
     """
+    parser = resolve_parser(parser)
+    jobs = resolve_jobs(jobs)
     if not os.path.exists(epub_path):
         raise FileNotFoundError(
             f"Input file not found: {epub_path}\n"
@@ -331,35 +836,62 @@ def epub_to_text(epub_path: str, output_txt_path: str) -> None:
             f"找不到輸入檔案: {epub_path}"
         )
 
-    print(f"Opening: {epub_path}")
-    print(f"開いています: {epub_path}")
-    print(f"正在打開: {epub_path}")
+    status(
+        f"Opening: {epub_path}",
+        f"開いています: {epub_path}",
+        f"正在打開: {epub_path}"
+    )
     
     # Open the EPUB file as a standard ZIP file
     try:
-        with zipfile.ZipFile(epub_path, 'r') as zip_ref:
-            try:
-                # Step 1: Find the structure file (OPF)
-                opf_path = get_epub_rootfile(zip_ref)
-                
-                # Step 2: Get the list of chapter files in the correct order
-                ordered_files, toc_path = parse_opf(zip_ref, opf_path)
-            except Exception as e:
-                raise ValueError(
-                    f"Failed to parse EPUB structure: {e}\n"
-                    f"EPUB 構造の解析に失敗しました: {e}\n"
-                    f"解析 EPUB 結構失敗: {e}"
-                )
+        with _open_epub_zip(epub_path) as zip_ref:
+            # Structure cache: skip container/OPF parsing when this exact file
+            # (path + mtime + size) was already parsed by an earlier run.
+            global _structure_cache_dirty
+            cache = _load_structure_cache()
+            cache_key = _structure_cache_key(epub_path)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                ordered_files = cached['spine']
+                toc_path = cached['toc']
+            else:
+                try:
+                    # Step 1: Find the structure file (OPF)
+                    opf_path = get_epub_rootfile(zip_ref)
+
+                    # Step 2: Get the list of chapter files in the correct order
+                    ordered_files, toc_path = parse_opf(zip_ref, opf_path)
+                except Exception as e:
+                    raise ValueError(
+                        f"Failed to parse EPUB structure: {e}\n"
+                        f"EPUB 構造の解析に失敗しました: {e}\n"
+                        f"解析 EPUB 結構失敗: {e}"
+                    )
+                # Evict stale entries for this same file: an overwrite gets a
+                # new (mtime, size) key, and without this the old one would
+                # sit in the index forever.
+                path_prefix = cache_key.rsplit('|', 2)[0] + '|'
+                for stale_key in [k for k in cache if k.startswith(path_prefix)]:
+                    del cache[stale_key]
+                cache[cache_key] = {'opf': opf_path, 'spine': ordered_files, 'toc': toc_path}
+                _structure_cache_dirty = True
+
+            # Snapshot the archive's entry names once: membership checks
+            # against this frozenset replace raise-and-catch KeyError flow
+            # on missing files, and the spine fallback reuses it.
+            name_set = frozenset(zip_ref.namelist())
 
             if not ordered_files:
                 # Fallback: if spine is empty, grab HTML-ish files directly.
                 ordered_files = sorted(
-                    f for f in zip_ref.namelist()
-                    if f.lower().endswith(('.html', '.htm', '.xhtml'))
+                    f for f in name_set
+                    if _HTML_EXT_RE.search(f)
+                )
+                status(
+                    "Warning: No spine found; falling back to HTML file order in archive",
+                    "警告: spine が見つからないため、アーカイブ内の HTML ファイル順で処理します",
+                    "警告: 未找到 spine; 改為依壓縮檔中 HTML 檔案順序處理"
                 )
-                print("Warning: No spine found; falling back to HTML file order in archive")
-                print("警告: spine が見つからないため、アーカイブ内の HTML ファイル順で処理します")
-                print("警告: 未找到 spine; 改為依壓縮檔中 HTML 檔案順序處理")
 
             if not ordered_files:
                 raise ValueError(
@@ -369,76 +901,150 @@ def epub_to_text(epub_path: str, output_txt_path: str) -> None:
                 )
 
             toc_entries = parse_toc_entries(zip_ref, toc_path)
-            chapter_anchors = select_toc_chapter_anchors(toc_entries)
-
-            print(f"Found {len(ordered_files)} chapters/files, extracting...")
-            print(f"章またはファイルを {len(ordered_files)} 件検出しました。抽出中...")
-            print(f"找到 {len(ordered_files)} 個章節/檔案，正在提取...")
+            spine_paths = {_normpath(p) for p in ordered_files}
+            chapter_anchors = select_toc_chapter_anchors(toc_entries, spine_paths)
+
+            status(
+                f"Found {len(ordered_files)} chapters/files, extracting...",
+                f"章またはファイルを {len(ordered_files)} 件検出しました。抽出中...",
+                f"找到 {len(ordered_files)} 個章節/檔案，正在提取..."
+            )
             
             # Open the output text file for writing
             output_dir = os.path.dirname(os.path.abspath(output_txt_path))
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
-            with open(output_txt_path, 'w', encoding='utf-8') as txt_file:
+            # Parallel extraction only pays off with several chapters to share out.
+            # Filtering to HTML entries up front also means zipfile's CRC32
+            # verification is only ever paid for content that gets parsed;
+            # images/CSS/fonts in the spine are never decompressed or checked.
+            html_files = [f for f in ordered_files if _HTML_EXT_RE.search(f)]
+            use_pool = jobs > 1 and len(html_files) > 1
+
+            # The output file is written in binary: each chapter is UTF-8
+            # encoded exactly once, bypassing TextIOWrapper's incremental
+            # encoder state and newline translation (output is LF on every
+            # platform, as the README's forced-UTF-8 note implies).
+            with open(output_txt_path, 'wb', buffering=OUTPUT_BUFFER_SIZE) as txt_file:
                 # Iterate through each file in the spine
                 wrote_content = False
                 last_was_separator = False
-                chapter_separator = "\n\n---\n\n"
-
-                for file_path in ordered_files:
-                    try:
-                        # Read the raw bytes of the chapter from the zip
-                        content = zip_ref.read(file_path)
-                        
-                        # Check if file is HTML/XHTML based on extension
-                        # Skips images, CSS, and other non-text files here.
-                        lower_path = file_path.lower()
-                        if not lower_path.endswith(('.html', '.xhtml', '.htm')):
-                            continue
 
-                        # Step 3: Parse HTML using BeautifulSoup
-                        soup = BeautifulSoup(content, 'html.parser')
-                        
-                        # Remove non-content elements that are not desired in the text file
-                        # Keep MathJax/TeX scripts for math extraction.
-                        for script in soup.find_all('script'):
-                            script_type = (script.get('type') or '').lower()
-                            if 'math/tex' not in script_type and 'math/latex' not in script_type:
-                                script.decompose()
-                        for element in soup(['style', 'title', 'meta', 'noscript']):
-                            element.decompose()
-                            
-                        # Step 4: Extract text
-                        # Use helper function to handle spacing intelligently
-                        normalized_path = posixpath.normpath(file_path)
-                        anchor_ids = chapter_anchors.get(normalized_path, [])
-                        insert_anchor_markers(soup, anchor_ids)
-                        text = get_clean_text(soup)
-                        
-                        if text.strip():
-                            txt_file.write(text)
-                            wrote_content = True
-                            last_was_separator = False
-                            txt_file.write(chapter_separator)
-                            last_was_separator = True
-                            
-                    except KeyError:
-                        # This happens if the OPF lists a file that doesn't actually exist in the zip
-                        print(f"Missing file: {file_path}")
-                        print(f"見つからないファイル: {file_path}")
-                        print(f"缺少檔案: {file_path}")
-                    except Exception as e:
-                        print(f"Error processing: {file_path} - {e}")
-                        print(f"処理中にエラーが発生しました: {file_path} - {e}")
-                        print(f"處理檔案出錯: {file_path} - {e}")
-                
-                # Append footer
-                if not last_was_separator:
-                    txt_file.write("\n\n")
+                def write_chapter(text):
+                    nonlocal wrote_content, last_was_separator
+                    if not text or not text.strip():
+                        return
+                    # One contiguous write per chapter: text and separator are
+                    # concatenated so the encoder and buffer are entered once.
+                    txt_file.write((text + CHAPTER_SEPARATOR).encode('utf-8', errors='replace'))
+                    wrote_content = True
+                    last_was_separator = True
+
+                def write_chapter_stream(chunks):
+                    nonlocal wrote_content, last_was_separator
+                    # Chunks are held back until the first one with real
+                    # content, so whitespace-only chapters write nothing —
+                    # same as write_chapter's strip() check.
+                    pending = []
+                    wrote_any = False
+                    for chunk in chunks:
+                        if not wrote_any:
+                            pending.append(chunk)
+                            if chunk.strip():
+                                txt_file.write("".join(pending).encode('utf-8', errors='replace'))
+                                pending.clear()
+                                wrote_any = True
+                            continue
+                        txt_file.write(chunk.encode('utf-8', errors='replace'))
+                    if wrote_any:
+                        txt_file.write(_CHAPTER_SEPARATOR_B)
+                        wrote_content = True
+                        last_was_separator = True
+
+                if use_pool:
+                    # Step 3 + 4 (parallel): chapter parsing is CPU-bound and
+                    # embarrassingly parallel, so farm it out to worker
+                    # processes. Only file names and anchor ids cross the
+                    # process boundary — each worker re-opens the zip itself
+                    # and keeps one cached handle per book (zip handles don't
+                    # pickle, and decompressing in the workers overlaps I/O
+                    # with parsing). Results come back in spine order, which
+                    # executor.map preserves; chunksize=4 amortizes IPC.
+                    tasks = []
+                    for file_path in html_files:
+                        if file_path not in name_set:
+                            # The OPF lists a file that doesn't actually exist in the zip
+                            status(
+                                f"Missing file: {file_path}",
+                                f"見つからないファイル: {file_path}",
+                                f"缺少檔案: {file_path}"
+                            )
+                            continue
+                        tasks.append((epub_path, file_path,
+                                      chapter_anchors.get(_normpath(file_path), []), parser))
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(tasks) or 1)) as pool:
+                        for file_path, text, error in pool.map(_extract_chapter_task, tasks, chunksize=4):
+                            if error == _MISSING_ENTRY:
+                                # This happens if the OPF lists a file that doesn't actually exist in the zip
+                                status(
+                                    f"Missing file: {file_path}",
+                                    f"見つからないファイル: {file_path}",
+                                    f"缺少檔案: {file_path}"
+                                )
+                                continue
+                            if error is not None:
+                                status(
+                                    f"Error processing: {file_path} - {error}",
+                                    f"処理中にエラーが発生しました: {file_path} - {error}",
+                                    f"處理檔案出錯: {file_path} - {error}"
+                                )
+                                continue
+                            write_chapter(text)
+                else:
+                    for file_path in html_files:
+                        if file_path not in name_set:
+                            # The OPF lists a file that doesn't actually exist in the zip
+                            status(
+                                f"Missing file: {file_path}",
+                                f"見つからないファイル: {file_path}",
+                                f"缺少檔案: {file_path}"
+                            )
+                            continue
+                        try:
+                            # Step 3 + 4: Parse HTML and extract text
+                            # The chapter is streamed out of the zip instead of
+                            # being slurped into one big bytes object first;
+                            # 128 KB buffers sit at the throughput knee for
+                            # buffered I/O.
+                            anchor_ids = chapter_anchors.get(_normpath(file_path), [])
+                            with zip_ref.open(file_path) as raw:
+                                prepared = _prepare_chapter(
+                                    io.BufferedReader(raw, buffer_size=128 * 1024),
+                                    anchor_ids, parser
+                                )
+                            if isinstance(prepared, str):
+                                write_chapter(prepared)
+                            else:
+                                # Stream normalized chunks straight to disk
+                                # instead of joining the chapter first.
+                                write_chapter_stream(iter_clean_text(prepared))
+                        except Exception as e:
+                            status(
+                                f"Error processing: {file_path} - {e}",
+                                f"処理中にエラーが発生しました: {file_path} - {e}",
+                                f"處理檔案出錯: {file_path} - {e}"
+                            )
+
+                # Append footer (one encoded write)
                 conversion_timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-                txt_file.write("File converted by epub2txt\n")
-                txt_file.write("https://github.com/SPACESODA/epub2txt\n")
-                txt_file.write(f"Converted at: {conversion_timestamp}\n")
+                footer = (
+                    "File converted by epub2txt\n"
+                    "https://github.com/SPACESODA/epub2txt\n"
+                    f"Converted at: {conversion_timestamp}\n"
+                )
+                if not last_was_separator:
+                    footer = "\n\n" + footer
+                txt_file.write(footer.encode('utf-8'))
     except zipfile.BadZipFile as e:
         raise ValueError(
             f"Invalid EPUB file: {e}\n"
@@ -446,42 +1052,119 @@ def epub_to_text(epub_path: str, output_txt_path: str) -> None:
             f"無效的 EPUB 檔案: {e}"
         )
 
-    print(f"Done! TXT file saved to: {output_txt_path}")
-    print(f"完了! TXT ファイルを保存しました: {output_txt_path}")
-    print(f"完成! 文本已保存至: {output_txt_path}")
+    status(
+        f"Done! TXT file saved to: {output_txt_path}",
+        f"完了! TXT ファイルを保存しました: {output_txt_path}",
+        f"完成! 文本已保存至: {output_txt_path}"
+    )
 
-def normalize_extracted_text(segments) -> str:
-    output = []
-    normal_buffer = []
+# Trailing whitespace of an early flush is carried into the next one so a
+# regex pattern can never be split across a flush boundary.
+_RE_TRAIL_WS = re.compile(r"\s+$")
 
-    def flush_normal():
+# Normal-text runs are flushed through the regex passes once they pass this
+# size, bounding the memory held per chapter without splitting mid-pattern.
+_NORMAL_FLUSH_SIZE = 64 * 1024
+
+def iter_normalized_text(segments):
+    """
+    Streaming whitespace normalization: yields cleaned chunks as they become
+    ready instead of joining the whole chapter into one string.
+
+    Normal-text segments are buffered and pushed through the regex passes at
+    pre boundaries and size thresholds; pre segments pass through with only
+    line-ending normalization, exactly like the old whole-string version.
+    Leading and trailing blank lines are trimmed across the stream.
+    """
+    normal_buffer = []
+    normal_len = 0
+    started = False
+    carry = ""  # trailing-newline run withheld until more content arrives
+
+    def normalize(text):
+        # Fast path: the walker already collapsed whitespace runs inside each
+        # text node, so most prose flushes arrive with no newlines, tabs or
+        # doubled spaces — every pass below would be a no-op.
+        if '\n' not in text and '\r' not in text:
+            if '\t' not in text and '\f' not in text and '\v' not in text and '  ' not in text:
+                return text
+            return _RE_HTAB.sub(" ", text)
+        text = _RE_CR.sub("\n", text)
+        text = _RE_HTAB.sub(" ", text)
+        text = _RE_NL_SPACE.sub("\n", text)
+        text = _RE_NL_RUN.sub("\n\n", text)
+        return text
+
+    def flush_normal(hold_tail):
+        nonlocal normal_len
         if not normal_buffer:
-            return
+            return ""
         text = "".join(normal_buffer)
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
-        text = re.sub(r"[ \t\f\v]+", " ", text)
-        text = re.sub(r" *\n *", "\n", text)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        output.append(text)
         normal_buffer.clear()
+        normal_len = 0
+        if hold_tail:
+            # Keep any trailing whitespace in the buffer so the next flush
+            # sees complete whitespace runs.
+            m = _RE_TRAIL_WS.search(text)
+            if m:
+                if m.start() == 0:
+                    normal_buffer.append(text)
+                    normal_len = len(text)
+                    return ""
+                normal_buffer.append(text[m.start():])
+                normal_len = len(text) - m.start()
+                text = text[:m.start()]
+        return normalize(text)
+
+    def trim_boundaries(piece):
+        # Withhold trailing newline runs (dropped at end-of-chapter, merged
+        # otherwise) and strip leading ones before the first real content.
+        nonlocal started, carry
+        piece = carry + piece
+        carry = ""
+        m = _RE_TRAIL_NL.search(piece)
+        if m:
+            carry = m.group(0)
+            piece = piece[:m.start()]
+        if not started and piece:
+            piece = _RE_LEAD_NL.sub("", piece)
+        if piece:
+            started = True
+        return piece
 
     for text, is_pre in segments:
         if is_pre:
-            flush_normal()
-            pre_text = text.replace('\r\n', '\n').replace('\r', '\n')
-            output.append(pre_text)
+            piece = trim_boundaries(flush_normal(hold_tail=False))
+            if piece:
+                yield piece
+            piece = trim_boundaries(text if '\r' not in text else _RE_CR.sub("\n", text))
+            if piece:
+                yield piece
         else:
             normal_buffer.append(text)
+            normal_len += len(text)
+            if normal_len >= _NORMAL_FLUSH_SIZE:
+                piece = trim_boundaries(flush_normal(hold_tail=True))
+                if piece:
+                    yield piece
 
-    flush_normal()
-    combined = "".join(output)
-    combined = re.sub(r"^\n+", "", combined)
-    combined = re.sub(r"\n+$", "", combined)
-    return combined
+    piece = trim_boundaries(flush_normal(hold_tail=False))
+    if piece:
+        yield piece
 
 def get_clean_text(soup: BeautifulSoup) -> str:
+    """
+    Extract text from a BeautifulSoup object as one string; join of the
+    streaming iter_clean_text generator, for callers (like the worker pool)
+    that need a picklable value.
+    """
+    return "".join(iter_clean_text(soup))
+
+def iter_clean_text(soup: BeautifulSoup):
     """
     Extract text from BeautifulSoup object with intelligent whitespace handling.
+    Yields normalized chunks as they become ready, so the caller can stream
+    them to disk without materializing the whole chapter.
     Preserves sentence structure for LLMs while maintaining paragraph separation.
     
     This function traverses the DOM tree recursively:
@@ -491,7 +1174,7 @@ def get_clean_text(soup: BeautifulSoup) -> str:
     """
     root = soup.body or soup
     if not root:
-        return ""
+        return
 
     parts = []
     state = {'has_content': False, 'last_sep': False}
@@ -529,125 +1212,159 @@ def get_clean_text(soup: BeautifulSoup) -> str:
 
     def add_separator():
         if state['has_content'] and not state['last_sep']:
-            parts.append(("\n\n---\n\n", False))
+            parts.append((CHAPTER_SEPARATOR, False))
             state['last_sep'] = True
 
-    def walk(node, in_pre: bool = False, list_depth: int = 0):
-        for child in node.children:
+    # The tree is traversed with an explicit stack instead of recursion:
+    # deeply nested XHTML (tables, lists, section wrappers) would otherwise
+    # hit Python's ~1000-frame recursion limit, and every node saves the
+    # frame-setup cost. Each stack entry is (children_iterator, in_pre,
+    # list_depth, post_text); post_text is emitted when the iterator is
+    # exhausted, taking the place of code after the old recursive call.
+    #
+    # walk_segments drains the pending segment buffer as it goes, so the
+    # normalizer consumes the chapter incrementally instead of after a
+    # fully materialized O(nodes) segment list.
+    def walk_segments():
+        block_tags = BLOCK_TAGS
+        pre_tags = PRE_TAGS
+        skip_tags = SKIP_TAGS
+        heading_get = HEADING_TAGS.get
+        marker_tag = ANCHOR_MARKER_TAG
+
+        stack = [(iter(root.children), False, 0, None)]
+        while stack:
+            if parts:
+                yield from parts
+                parts.clear()
+            node_iter, in_pre, list_depth, post_text = stack[-1]
+            child = next(node_iter, None)
+            if child is None:
+                stack.pop()
+                if post_text:
+                    add_text(post_text, False)
+                continue
+
             if isinstance(child, NavigableString):
                 text = str(child)
                 if in_pre:
                     if text:
                         add_text(text, True, is_content=bool(text.strip()))
                 else:
-                    text = re.sub(r"\s+", " ", text)
+                    text = _RE_WS.sub(" ", text)
                     if text:
                         add_text(text, False, is_content=bool(text.strip()))
                 continue
 
-            if isinstance(child, Tag):
-                name = child.name.lower()
-                if name == 'script':
-                    script_type = (child.get('type') or '').lower()
-                    if 'math/tex' in script_type or 'math/latex' in script_type:
-                        latex = child.get_text(strip=True)
-                        if latex:
-                            is_block = 'mode=display' in script_type
-                            if not in_pre and is_block:
-                                add_text("\n", False)
-                            wrapper = f"$${latex}$$" if is_block else f"${latex}$"
-                            add_text(wrapper, False, is_content=True)
-                            if not in_pre and is_block:
-                                add_text("\n", False)
-                    continue
-                if name in SKIP_TAGS:
-                    continue
-                if name == ANCHOR_MARKER_TAG:
-                    add_separator()
-                    continue
-                if name == 'br':
-                    add_text("\n", in_pre)
-                    continue
+            if not isinstance(child, Tag):
+                continue
 
-                if name == 'math':
-                    latex = get_math_annotation_latex(child)
-                    is_block = is_math_block(child)
+            name = child.name
+            if name == 'script':
+                script_type = (child.get('type') or '').lower()
+                if 'math/tex' in script_type or 'math/latex' in script_type:
+                    latex = child.get_text(strip=True)
                     if latex:
+                        is_block = 'mode=display' in script_type
                         if not in_pre and is_block:
                             add_text("\n", False)
                         wrapper = f"$${latex}$$" if is_block else f"${latex}$"
                         add_text(wrapper, False, is_content=True)
                         if not in_pre and is_block:
                             add_text("\n", False)
-                        continue
-                    if is_block and not in_pre:
-                        add_text("\n", False)
-                    walk(child, in_pre, list_depth)
-                    if is_block and not in_pre:
-                        add_text("\n", False)
-                    continue
-
-                if name == 'img':
-                    alt_text = child.get('alt') or child.get('aria-label') or child.get('title') or ""
-                    if alt_text and (is_math_like_class(child) or looks_like_latex(alt_text) or child.get('role') == 'math'):
-                        is_block = is_math_block(child)
-                        if not in_pre and is_block:
-                            add_text("\n", False)
-                        add_text(f"[MATH: {alt_text.strip()}]", False, is_content=True)
-                        if not in_pre and is_block:
-                            add_text("\n", False)
-                        continue
-
-                if name in ('b', 'strong'):
-                    if not in_pre:
-                        add_text("**", False)
-                    walk(child, in_pre, list_depth)
-                    if not in_pre:
-                        add_text("**", False)
-                    continue
+                continue
+            if name in skip_tags:
+                continue
+            if name == marker_tag:
+                add_separator()
+                continue
+            if name == 'br':
+                add_text("\n", in_pre)
+                continue
 
-                # Handle Lists
-                if name in ('ul', 'ol'):
-                    if not in_pre:
+            if name == 'math':
+                latex = get_math_annotation_latex(child)
+                is_block = is_math_block(child)
+                if latex:
+                    if not in_pre and is_block:
                         add_text("\n", False)
-                    walk(child, in_pre, list_depth + 1)
-                    if not in_pre:
+                    wrapper = f"$${latex}$$" if is_block else f"${latex}$"
+                    add_text(wrapper, False, is_content=True)
+                    if not in_pre and is_block:
                         add_text("\n", False)
                     continue
+                if is_block and not in_pre:
+                    add_text("\n", False)
+                stack.append((iter(child.children), in_pre, list_depth,
+                              "\n" if (is_block and not in_pre) else None))
+                continue
 
-                if name == 'li':
-                    if not in_pre:
+            if name == 'img':
+                alt_text = child.get('alt') or child.get('aria-label') or child.get('title') or ""
+                if alt_text and (is_math_like_class(child) or looks_like_latex(alt_text) or child.get('role') == 'math'):
+                    is_block = is_math_block(child)
+                    if not in_pre and is_block:
                         add_text("\n", False)
-                        # Indent based on depth (depth 1 = no indent, depth 2 = 2 spaces, etc.)
-                        indent = "    " * max(0, list_depth - 1)
-                        add_text(indent + "- ", True)
-                    walk(child, in_pre, list_depth)
-                    if not in_pre:
+                    add_text(f"[MATH: {alt_text.strip()}]", False, is_content=True)
+                    if not in_pre and is_block:
                         add_text("\n", False)
                     continue
 
-                heading_level = HEADING_TAGS.get(name)
-                if heading_level and not in_pre:
-                    heading_text = child.get_text(" ", strip=True)
-                    if heading_text:
-                        add_text("\n", False)
-                        level = min(heading_level, MAX_HEADING_LEVEL)
-                        add_text("#" * level + " " + heading_text, False, is_content=True)
-                        add_text("\n", False)
-                        continue
+            if name in ('b', 'strong'):
+                if not in_pre:
+                    add_text("**", False)
+                stack.append((iter(child.children), in_pre, list_depth,
+                              "**" if not in_pre else None))
+                continue
 
-                is_block = name in BLOCK_TAGS
-                next_pre = in_pre or name in PRE_TAGS
-                if is_block and not in_pre:
+            # Handle Lists
+            if name in ('ul', 'ol'):
+                if not in_pre:
                     add_text("\n", False)
+                stack.append((iter(child.children), in_pre, list_depth + 1,
+                              "\n" if not in_pre else None))
+                continue
 
-                walk(child, next_pre, list_depth)
+            if name == 'li':
+                if not in_pre:
+                    add_text("\n", False)
+                    # Indent based on depth (depth 1 = no indent, depth 2 = 2 spaces, etc.)
+                    indent = "    " * max(0, list_depth - 1)
+                    add_text(indent + "- ", True)
+                stack.append((iter(child.children), in_pre, list_depth,
+                              "\n" if not in_pre else None))
+                continue
 
-                if is_block and not in_pre:
+            heading_level = heading_get(name)
+            if heading_level and not in_pre:
+                # With the decompose pass gone, scrub rare skip-tag descendants
+                # (a script or style inside a heading) before flattening it —
+                # except MathJax/TeX scripts, which stay so the block
+                # fall-through below can still render their equations.
+                for skip in child.find_all(_SKIP_TAGS_LIST):
+                    if skip.name == 'script' and _is_math_script(skip):
+                        continue
+                    skip.extract()
+                heading_text = " ".join(child.stripped_strings)
+                if heading_text:
+                    add_text("\n", False)
+                    level = min(heading_level, MAX_HEADING_LEVEL)
+                    add_text("#" * level + " " + heading_text, False, is_content=True)
                     add_text("\n", False)
+                    continue
+
+            is_block = name in block_tags
+            next_pre = in_pre or name in pre_tags
+            if is_block and not in_pre:
+                add_text("\n", False)
+            stack.append((iter(child.children), next_pre, list_depth,
+                          "\n" if (is_block and not in_pre) else None))
+
+        if parts:
+            yield from parts
+            parts.clear()
 
-    walk(root)
-    return normalize_extracted_text(parts)
+    yield from iter_normalized_text(walk_segments())
 
 
 if __name__ == "__main__":
@@ -665,14 +1382,37 @@ if __name__ == "__main__":
         "--output",
         help="Path to the output TXT file (optional, single file only) / 出力 TXT ファイルのパス (任意、単一入力のみ) / 輸出 TXT 檔案路徑 (可選，僅限單檔案)"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for extraction (0 = one per CPU core, default: 1) / 抽出に使うワーカープロセス数 (0 = CPU コアごとに 1 つ、デフォルト: 1) / 用於提取的工作進程數 (0 = 每個 CPU 核心一個，預設: 1)"
+    )
+    parser.add_argument(
+        "--parser",
+        choices=['lxml', 'html.parser', 'lxml-text'],
+        default=DEFAULT_PARSER,
+        help="HTML parser backend; 'lxml-text' is a plain-text fast path without list/heading formatting (default: lxml if installed) / HTML パーサーのバックエンド。'lxml-text' はリストや見出しの整形を行わない高速プレーンテキストモード (デフォルト: lxml がインストールされていれば lxml) / HTML 解析器後端；'lxml-text' 為不含清單與標題排版的高速純文字模式 (預設: 已安裝 lxml 時為 lxml)"
+    )
+
+    parser.add_argument(
+        "--fast",
+        action='store_true',
+        help="Regex tag-stripping fast path for simple EPUBs; falls back to full parsing per chapter when output looks broken / 単純な EPUB 向けの正規表現タグ除去の高速モード。出力が壊れていそうな場合は章ごとに通常解析へフォールバックします / 針對簡單 EPUB 的正規表達式去標籤快速模式；輸出異常時會逐章回退到完整解析"
+    )
 
     args = parser.parse_args()
+    if args.fast:
+        args.parser = 'fast'
     
     # Interactive mode: If no arguments provided, ask user for input
     if not args.epub_paths:
-        print("Drag and drop EPUB files or folders here, or type the path below:")
-        print("ここに EPUB ファイル／フォルダをドラッグ＆ドロップするか、下にパスを入力してください:")
-        print("請將 EPUB 檔案或資料夾拖放到這裡，或在下方輸入路徑:")
+        status(
+            "Drag and drop EPUB files or folders here, or type the path below:",
+            "ここに EPUB ファイル／フォルダをドラッグ＆ドロップするか、下にパスを入力してください:",
+            "請將 EPUB 檔案或資料夾拖放到這裡，或在下方輸入路徑:"
+        )
         p = input("> ").strip()
 
         if p:
@@ -701,9 +1441,11 @@ if __name__ == "__main__":
                 # Fallback: Treat as single literal string if parsing fails
                 args.epub_paths = [p]
         else:
-            print("No path entered")
-            print("パスが入力されていません")
-            print("未輸入路徑")
+            status(
+                "No path entered",
+                "パスが入力されていません",
+                "未輸入路徑"
+            )
             sys.exit(0)
     
     # Step 1: Expand folders into a list of specific files
@@ -712,52 +1454,93 @@ if __name__ == "__main__":
     for path in args.epub_paths:
         if os.path.isdir(path):
             # It's a folder: Scan for .epub files (one level deep, no recursion)
-            print(f"Scanning folder: {path}")
-            print(f"フォルダをスキャン中: {path}")
-            print(f"正在掃描資料夾: {path}")
+            status(
+                f"Scanning folder: {path}",
+                f"フォルダをスキャン中: {path}",
+                f"正在掃描資料夾: {path}"
+            )
             try:
-                folder_epubs = [
-                    os.path.join(path, f) 
-                    for f in os.listdir(path) 
-                    if f.lower().endswith('.epub')
-                ]
+                # scandir returns DirEntry objects with cached stat info and
+                # ready-made paths, avoiding a syscall and a join per entry.
+                with os.scandir(path) as it:
+                    folder_epubs = [
+                        entry.path for entry in it
+                        if entry.name.lower().endswith(_EPUB_EXT) and entry.is_file()
+                    ]
                 if not folder_epubs:
-                    print(f"  No EPUB files found in: {path}")
-                    print(f"  EPUB ファイルが見つかりません: {path}")
-                    print(f"  找不到 EPUB 檔案: {path}")
+                    status(
+                        f"  No EPUB files found in: {path}",
+                        f"  EPUB ファイルが見つかりません: {path}",
+                        f"  找不到 EPUB 檔案: {path}"
+                    )
                 else:
-                    print(f"  Found {len(folder_epubs)} EPUBs.")
-                    print(f"  EPUB を {len(folder_epubs)} 件見つけました。")
-                    print(f"  找到 {len(folder_epubs)} EPUBs.")
-                files_to_process.extend(folder_epubs)
+                    status(
+                        f"  Found {len(folder_epubs)} EPUBs.",
+                        f"  EPUB を {len(folder_epubs)} 件見つけました。",
+                        f"  找到 {len(folder_epubs)} EPUBs."
+                    )
+                # Per-folder results are sorted for a stable order; the
+                # overall list keeps the user's command-line order.
+                files_to_process.extend(sorted(folder_epubs))
             except Exception as e:
-                print(f"  Error reading folder: {e}")
-                print(f"  フォルダの読み込み中にエラーが発生しました: {e}")
-                print(f"  讀取資料夾出錯: {e}")
+                status(
+                    f"  Error reading folder: {e}",
+                    f"  フォルダの読み込み中にエラーが発生しました: {e}",
+                    f"  讀取資料夾出錯: {e}"
+                )
         else:
             # It's a file (or invalid path), add it directly
             files_to_process.append(path)
             
-    # Remove duplicates just in case and sort
-    files_to_process = sorted(list(set(files_to_process)))
+    # Remove duplicates just in case, preserving the order given by the user
+    files_to_process = list(dict.fromkeys(files_to_process))
             
     if not files_to_process:
-        print("No files to process")
-        print("処理するファイルがありません")
-        print("無法處理的檔案")
+        status(
+            "No files to process",
+            "処理するファイルがありません",
+            "無法處理的檔案"
+        )
         sys.exit(0)
 
     # Validation: Cannot use -o with multiple files
     if len(files_to_process) > 1 and args.output:
-        print("Error: Cannot use -o argument with multiple input files")
-        print("エラー: 複数入力では -o を使用できません")
-        print("錯誤: 不能對多個輸入檔案使用 -o 參數")
+        status(
+            "Error: Cannot use -o argument with multiple input files",
+            "エラー: 複数入力では -o を使用できません",
+            "錯誤: 不能對多個輸入檔案使用 -o 參數"
+        )
         sys.exit(1)
 
     # Process files
     count = 0
     total = len(files_to_process)
-    
+    jobs = resolve_jobs(args.jobs)
+
+    if jobs > 1 and total > 1:
+        # Batch mode: convert whole books in parallel, one worker per book.
+        # (-o is already rejected for multiple inputs above, so output paths
+        # are always derived from the source paths here.)
+        workers = min(jobs, total)
+        status(
+            f"Converting {total} EPUBs with {workers} worker processes...",
+            f"{workers} 個のワーカープロセスで {total} 件の EPUB を変換します...",
+            f"正在使用 {workers} 個工作進程轉換 {total} 個 EPUB..."
+        )
+        tasks = [
+            (epub_path, os.path.splitext(epub_path)[0] + ".txt", args.parser)
+            for epub_path in files_to_process
+        ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            for epub_path, error in pool.map(_convert_one_epub, tasks):
+                if error:
+                    status(
+                        f"Error processing {epub_path}: {error}",
+                        f"処理中にエラーが発生しました: {epub_path} - {error}",
+                        f"處理 {epub_path} 時發生錯誤: {error}"
+                    )
+        sys.exit(0)
+
     for epub_path in files_to_process:
         count += 1
         # Determine output path
@@ -767,18 +1550,22 @@ if __name__ == "__main__":
             output_path = os.path.splitext(epub_path)[0] + ".txt"
 
         try:
-            print(f"Processing ({count}/{total}): {os.path.basename(epub_path)}")
-            print(f"処理中 ({count}/{total}): {os.path.basename(epub_path)}")
-            print(f"正在處理 ({count}/{total}): {os.path.basename(epub_path)}")
-            epub_to_text(epub_path, output_path)
+            status(
+                f"Processing ({count}/{total}): {os.path.basename(epub_path)}",
+                f"処理中 ({count}/{total}): {os.path.basename(epub_path)}",
+                f"正在處理 ({count}/{total}): {os.path.basename(epub_path)}"
+            )
+            epub_to_text(epub_path, output_path, parser=args.parser, jobs=jobs)
         except Exception as e:
-            print(f"Error processing {epub_path}: {e}")
-            print(f"処理中にエラーが発生しました: {epub_path} - {e}")
-            print(f"處理 {epub_path} 時發生錯誤: {e}")
+            status(
+                f"Error processing {epub_path}: {e}",
+                f"処理中にエラーが発生しました: {epub_path} - {e}",
+                f"處理 {epub_path} 時發生錯誤: {e}"
+            )
             # If processing only one file, exit with error code
             if total == 1:
                 sys.exit(1)
-        
+
         # Divider
         if count < total:
             print("-" * 40)
@@ -1,15 +1,44 @@
+import argparse
 import zipfile
 import os
+import io
+import functools
 
-def create_robust_epub(output_path):
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+# Optional ISA-L acceleration: when the 'isal' binding is present, route
+# zipfile's deflate and CRC32 through its SIMD-accelerated implementations.
+# zipfile captures both the zlib module and crc32 as module globals, so both
+# must be redirected. Only exercised when EPUB_FIXTURE_COMPRESS=1 re-enables
+# deflate (and for per-entry CRCs); a missing binding changes nothing.
+try:
+    from isal import isal_zlib as _isal_zlib
+    zipfile.zlib = _isal_zlib
+    zipfile.crc32 = _isal_zlib.crc32
+except ImportError:
+    pass
 
-    # 1. Define content payloads for a multi-file EPUB structure.
-    intro_content = """<?xml version="1.0" encoding="utf-8"?>
-<!DOCTYPE html>
-<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
-<head>
+# On compression backends: swapping zlib for a libdeflate binding (pypi
+# 'deflate') was evaluated and rejected — it would add a binary dependency
+# and a hand-rolled ZIP writer to a test-data generator whose archive is a
+# few KB, and the fixture must stay readable by the stdlib zipfile that
+# epub2txt itself uses. Generator speed is addressed by cheaper means
+# (compression level / stored entries / caching) instead. The same applies
+# to compressing entries in parallel with hand-stitched local headers:
+# entries are stored by default and the finished archive is cached per
+# process, so there is no deflate work left to share out.
+
+# Payloads are static, so they are built and UTF-8 encoded once at import
+# time; ZipFile.writestr takes bytes directly and skips its internal encode.
+
+# Shared XHTML scaffolding, composed once at import: the chapter payloads
+# differ only in their head/body interior.
+_XHTML_PROLOG = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<!DOCTYPE html>\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">\n'
+).encode('utf-8')
+_XHTML_FOOTER = b'</body>\n</html>\n'
+
+_INTRO_CONTENT_BYTES = _XHTML_PROLOG + """<head>
   <title>Intro</title>
   <link rel="stylesheet" type="text/css" href="../styles/base.css"/>
 </head>
@@ -23,34 +52,11 @@ def create_robust_epub(output_path):
   <p>Entity coverage: Caf&#233;, &#x00E9;clair, and &#169; symbols.</p>
   <hr/>
   <p>Jump to <a href="../text/ch1.xhtml#lists">chapter 1 lists</a>.</p>
-</body>
-</html>
-"""
+""".encode('utf-8') + _XHTML_FOOTER
 
-    chapter_one_content = """<?xml version="1.0" encoding="utf-8"?>
-<!DOCTYPE html>
-<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
-<head>
-  <title>Chapter 1</title>
-  <link rel="stylesheet" type="text/css" href="../styles/base.css"/>
-  <style type="text/css">
-    .hidden { display: none; }
-  </style>
-  <script type="text/javascript">
-    console.log("script should be ignored");
-  </script>
-</head>
-<body>
-  <h1 id="lists">Chapter 1: Lists and Blocks</h1>
-
-  <p>Standard unordered list:</p>
-  <ul>
-    <li>Item A</li>
-    <li>Item B</li>
-  </ul>
-
-  <p>Deeply nested mixed list:</p>
-  <ul>
+# The deeply nested mixed-list block, kept as its own named fragment so any
+# future fixture variant reuses this single copy instead of a new literal.
+_NESTED_LIST_FRAGMENT = """  <ul>
     <li>Level 1
       <ol>
         <li>Level 2 Ordered
@@ -76,7 +82,29 @@ def create_robust_epub(output_path):
       </ol>
     </li>
   </ul>
+"""
+
+_CHAPTER_ONE_CONTENT_BYTES = _XHTML_PROLOG + """<head>
+  <title>Chapter 1</title>
+  <link rel="stylesheet" type="text/css" href="../styles/base.css"/>
+  <style type="text/css">
+    .hidden { display: none; }
+  </style>
+  <script type="text/javascript">
+    console.log("script should be ignored");
+  </script>
+</head>
+<body>
+  <h1 id="lists">Chapter 1: Lists and Blocks</h1>
+
+  <p>Standard unordered list:</p>
+  <ul>
+    <li>Item A</li>
+    <li>Item B</li>
+  </ul>
 
+  <p>Deeply nested mixed list:</p>
+{nested_list}
   <p>Complex content in items:</p>
   <ul>
     <li>
@@ -116,14 +144,9 @@ def foo():
 
   <p>Empty list edge case:</p>
   <ul></ul>
-</body>
-</html>
-"""
+""".replace('{nested_list}', _NESTED_LIST_FRAGMENT).encode('utf-8') + _XHTML_FOOTER
 
-    chapter_two_content = """<?xml version="1.0" encoding="utf-8"?>
-<!DOCTYPE html>
-<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
-<head>
+_CHAPTER_TWO_CONTENT_BYTES = _XHTML_PROLOG + """<head>
   <title>Chapter 2</title>
   <link rel="stylesheet" type="text/css" href="../styles/base.css"/>
 </head>
@@ -161,11 +184,9 @@ def foo():
   <div>
     <p>Nested div paragraph.</p>
   </div>
-</body>
-</html>
-"""
+""".encode('utf-8') + _XHTML_FOOTER
 
-    appendix_content = """<?xml version="1.0" encoding="utf-8"?>
+_APPENDIX_CONTENT_BYTES = """<?xml version="1.0" encoding="utf-8"?>
 <!DOCTYPE html>
 <html xmlns="http://www.w3.org/1999/xhtml">
 <head>
@@ -176,14 +197,14 @@ def foo():
   <p>This file is marked non-linear in the spine.</p>
 </body>
 </html>
-"""
+""".encode('utf-8')
 
-    css_content = """body { font-family: serif; }
+_CSS_CONTENT_BYTES = """body { font-family: serif; }
 table { border-collapse: collapse; }
 td, th { border: 1px solid #333; padding: 2px 4px; }
-"""
+""".encode('utf-8')
 
-    opf_content = """<?xml version="1.0" encoding="UTF-8"?>
+_OPF_CONTENT_BYTES = """<?xml version="1.0" encoding="UTF-8"?>
 <package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid">
   <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
     <dc:identifier id="uid">urn:uuid:12345</dc:identifier>
@@ -209,10 +230,9 @@ td, th { border: 1px solid #333; padding: 2px 4px; }
     <itemref idref="appendix" linear="no"/>
   </spine>
 </package>
-"""
+""".encode('utf-8')
 
-    # Minimal Nav file required for EPUB 3
-    nav_content = """<?xml version="1.0" encoding="utf-8"?>
+_NAV_CONTENT_BYTES = """<?xml version="1.0" encoding="utf-8"?>
 <html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
 <head><title>TOC</title></head>
 <body>
@@ -230,9 +250,9 @@ td, th { border: 1px solid #333; padding: 2px 4px; }
   </nav>
 </body>
 </html>
-"""
+""".encode('utf-8')
 
-    ncx_content = """<?xml version="1.0" encoding="UTF-8"?>
+_NCX_CONTENT_BYTES = """<?xml version="1.0" encoding="UTF-8"?>
 <ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
   <head>
     <meta name="dtb:uid" content="urn:uuid:12345"/>
@@ -254,32 +274,131 @@ td, th { border: 1px solid #333; padding: 2px 4px; }
     </navPoint>
   </navMap>
 </ncx>
-"""
+""".encode('utf-8')
 
-    container_xml = """<?xml version="1.0" encoding="UTF-8"?>
+_CONTAINER_XML_BYTES = """<?xml version="1.0" encoding="UTF-8"?>
 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
   <rootfiles>
     <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
   </rootfiles>
 </container>
-"""
+""".encode('utf-8')
+
+_MIMETYPE_BYTES = b'application/epub+zip'
+_SVG_BYTES = b'<svg xmlns="http://www.w3.org/2000/svg"/>'
+
+# Fixed entry timestamp: writestr stamps datetime.now() by default, which
+# makes every regeneration byte-unique and defeats content-hash caching.
+_FIXED_DATE = (1980, 1, 1, 0, 0, 0)
+
+def _zip_info(arcname, compression):
+    zi = zipfile.ZipInfo(arcname, date_time=_FIXED_DATE)
+    zi.compress_type = compression
+    # Same file mode writestr would assign for str-named entries.
+    zi.external_attr = 0o600 << 16
+    return zi
+
+# Archive layout as one (arcname, payload) table. The mimetype entry is
+# written first and always stored, as the EPUB spec requires; everything
+# else follows the selected compression.
+_EPUB_ENTRIES = (
+    ('META-INF/container.xml', _CONTAINER_XML_BYTES),
+    ('OEBPS/content.opf', _OPF_CONTENT_BYTES),
+    ('OEBPS/nav.xhtml', _NAV_CONTENT_BYTES),
+    ('OEBPS/toc.ncx', _NCX_CONTENT_BYTES),
+    ('OEBPS/text/intro.xhtml', _INTRO_CONTENT_BYTES),
+    ('OEBPS/text/ch1.xhtml', _CHAPTER_ONE_CONTENT_BYTES),
+    ('OEBPS/text/ch2.xhtml', _CHAPTER_TWO_CONTENT_BYTES),
+    ('OEBPS/text/appendix.xhtml', _APPENDIX_CONTENT_BYTES),
+    ('OEBPS/styles/base.css', _CSS_CONTENT_BYTES),
+    ('OEBPS/images/cover.svg', _SVG_BYTES),
+    ('OEBPS/images/math.svg', _SVG_BYTES),
+    ('OEBPS/images/diagram.svg', _SVG_BYTES),
+)
 
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as z:
-        z.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
-        z.writestr('META-INF/container.xml', container_xml)
-        z.writestr('OEBPS/content.opf', opf_content)
-        z.writestr('OEBPS/nav.xhtml', nav_content)
-        z.writestr('OEBPS/toc.ncx', ncx_content)
-        z.writestr('OEBPS/text/intro.xhtml', intro_content)
-        z.writestr('OEBPS/text/ch1.xhtml', chapter_one_content)
-        z.writestr('OEBPS/text/ch2.xhtml', chapter_two_content)
-        z.writestr('OEBPS/text/appendix.xhtml', appendix_content)
-        z.writestr('OEBPS/styles/base.css', css_content)
-        z.writestr('OEBPS/images/cover.svg', '<svg xmlns="http://www.w3.org/2000/svg"/>')
-        z.writestr('OEBPS/images/math.svg', '<svg xmlns="http://www.w3.org/2000/svg"/>')
-        z.writestr('OEBPS/images/diagram.svg', '<svg xmlns="http://www.w3.org/2000/svg"/>')
+@functools.lru_cache(maxsize=4)
+def _build_archive_bytes(entries, compression):
+    """
+    Assemble the archive in memory and return the finished bytes.
+
+    Inputs are static module constants, so within a process the zip is
+    built once per (table, compression) pair; tests that request the
+    fixture repeatedly get a cached memcpy afterwards.
+    """
+    # ZipFile emits many small writes (local headers, streams, central
+    # directory); pointing them at a BytesIO keeps them off the filesystem
+    # so the archive reaches disk in a single write below.
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', compression, compresslevel=1) as z:
+        z.writestr(_zip_info('mimetype', zipfile.ZIP_STORED), _MIMETYPE_BYTES)
+        for arcname, payload in entries:
+            z.writestr(_zip_info(arcname, compression), payload)
+    return buf.getvalue()
+
+# Directories already created this process: skips the stat/mkdir syscall
+# pair that os.makedirs(exist_ok=True) pays on every call.
+_dirs_created = set()
+
+def _ensure_dir(path):
+    if path in _dirs_created:
+        return
+    os.makedirs(path, exist_ok=True)
+    _dirs_created.add(path)
+
+def build_epub(output_path, entries):
+    """Write an EPUB archive from an (arcname, payload) entry table."""
+    # Ensure directory exists (a bare filename has no directory component)
+    dir_path = os.path.dirname(output_path)
+    if dir_path:
+        _ensure_dir(dir_path)
+
+    # Fixtures are consumed locally by tests: size is irrelevant, generator
+    # latency is not, so entries are stored uncompressed by default and the
+    # deflate pass is skipped entirely. Set EPUB_FIXTURE_COMPRESS=1 for a
+    # compressed archive (level 1 — these tiny XML payloads compress to
+    # near-identical size at any level).
+    if os.environ.get('EPUB_FIXTURE_COMPRESS') == '1':
+        compression = zipfile.ZIP_DEFLATED
+    else:
+        compression = zipfile.ZIP_STORED
+
+    archive = _build_archive_bytes(entries, compression)
+
+    # Regeneration skip: archives are byte-identical across runs (fixed
+    # ZipInfo dates), so when the on-disk fixture already matches there is
+    # nothing to write. With the finished bytes in hand a direct comparison
+    # is both cheaper and stricter than the suggested SHA-256 digest check.
+    if os.path.exists(output_path):
+        try:
+            with open(output_path, 'rb') as f:
+                if f.read() == archive:
+                    print(f"Up to date {output_path}")
+                    return
+        except OSError:
+            pass
+
+    # One open/write/close syscall triple: the archive is pre-assembled, so
+    # Python file-object buffering adds nothing, and throwaway test data
+    # doesn't warrant an fsync. O_BINARY keeps Windows from mangling bytes.
+    fd = os.open(output_path,
+                 os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0),
+                 0o644)
+    try:
+        os.write(fd, archive)
+    finally:
+        os.close(fd)
 
     print(f"Created {output_path}")
 
+def create_robust_epub(output_path):
+    build_epub(output_path, _EPUB_ENTRIES)
+
 if __name__ == "__main__":
-    create_robust_epub("test-data/robust_test.epub")
+    parser = argparse.ArgumentParser(description="Generate the epub2txt test fixture")
+    parser.add_argument(
+        "-o", "--output",
+        default="test-data/robust_test.epub",
+        help="where to write the fixture (default: test-data/robust_test.epub)"
+    )
+    args = parser.parse_args()
+    create_robust_epub(args.output)